@@ -1,8 +1,174 @@
 from __future__ import print_function
 
+import struct
+from collections import namedtuple
+from operator import attrgetter
+
 import gdb
 
 
+# Cache of gdb.Type objects, keyed by type name as written in C (e.g.
+# 'void *'). Looking types up walks the symbol tables, so do it once and
+# reuse the result.
+_TYPE_CACHE = {}
+
+# Cache of the set of field names of a struct, keyed by struct type name
+_FIELD_NAMES_CACHE = {}
+
+# Cache of the unpackers for the scalar fields of a struct read as raw bytes,
+# keyed by struct type name. See _struct_unpackers.
+_UNPACKERS_CACHE = {}
+
+
+def _lookup_type(name):
+    """Return the gdb.Type for name, looking it up only once"""
+    try:
+        return _TYPE_CACHE[name]
+    except KeyError:
+        _TYPE_CACHE[name] = gdb.lookup_type(name)
+        return _TYPE_CACHE[name]
+
+
+def _void_ptr_type():
+    """Return a gdb.Type which is a void pointer"""
+    if 'void *' not in _TYPE_CACHE:
+        _TYPE_CACHE['void *'] = _lookup_type('void').pointer()
+    return _TYPE_CACHE['void *']
+
+
+def _thread_type():
+    """Return the gdb.Type of the ChibiOS/RT Thread struct"""
+    return _lookup_type('Thread')
+
+
+def _thread_fields():
+    """Return the set of field names in the Thread struct"""
+    if 'Thread' not in _FIELD_NAMES_CACHE:
+        _FIELD_NAMES_CACHE['Thread'] = frozenset(_thread_type().keys())
+    return _FIELD_NAMES_CACHE['Thread']
+
+
+# Cache of the addresses of global variables, keyed by symbol name. Only
+# addresses are kept; a cached gdb.Value of the variable would go stale.
+_SYMBOL_CACHE = {}
+
+
+def _symbol_address(name):
+    """Return a pointer to the global variable name, looking it up only once.
+    Raises gdb.error if there is no such symbol.
+    """
+    try:
+        return _SYMBOL_CACHE[name]
+    except KeyError:
+        symbol = gdb.lookup_global_symbol(name)
+        if symbol is None:
+            raise gdb.error("No symbol \"{}\"".format(name))
+        _SYMBOL_CACHE[name] = symbol.value().address
+        return _SYMBOL_CACHE[name]
+
+
+def _clear_caches(event):
+    """Drop cached types, struct information, symbols and the result of
+    ChibiosThread.sanity_check() when new symbols are loaded
+    """
+    _TYPE_CACHE.clear()
+    _FIELD_NAMES_CACHE.clear()
+    _UNPACKERS_CACHE.clear()
+    _SYMBOL_CACHE.clear()
+    ChibiosThread._layout = None
+
+
+gdb.events.new_objfile.connect(_clear_caches)
+
+
+def _write_lines(lines):
+    """Write lines to gdb's output stream with a single call"""
+    gdb.write("\n".join(lines) + "\n")
+
+
+# struct format characters for unsigned integers, keyed by size in bytes.
+# The lowercase character is used for signed integers.
+_UNPACK_FORMATS = {1: 'B', 2: 'H', 4: 'I', 8: 'Q'}
+
+
+def _target_byte_order():
+    """Return the struct byte order character of the target"""
+    if 'big endian' in gdb.execute('show endian', to_string=True):
+        return '>'
+    return '<'
+
+
+def _is_signed(field_type):
+    """Return True if field_type is a signed integer type"""
+    if field_type.strip_typedefs().code == gdb.TYPE_CODE_PTR:
+        return False
+    return gdb.Value(-1).cast(field_type) < 0
+
+
+def _struct_unpackers(struct_type, names):
+    """Return a (name, offset, struct.Struct) tuple for each of the named
+    fields of struct_type. Only byte aligned integer and pointer fields are
+    supported.
+    """
+    fields = dict((f.name, f) for f in struct_type.strip_typedefs().fields())
+    byte_order = _target_byte_order()
+
+    unpackers = []
+    for name in names:
+        field = fields[name]
+        fmt = _UNPACK_FORMATS[field.type.sizeof]
+        if _is_signed(field.type):
+            fmt = fmt.lower()
+        fmt = byte_order + fmt
+        unpackers.append((name, field.bitpos // 8, struct.Struct(fmt)))
+
+    return unpackers
+
+
+def _unpack_fields(raw, base, unpackers):
+    """Unpack the fields of the struct starting at base in raw into a dict"""
+    values = {}
+    for name, offset, unpacker in unpackers:
+        values[name] = unpacker.unpack_from(raw, base + offset)[0]
+    return values
+
+
+def _thread_unpackers():
+    """Return the unpackers for the scalar fields of the Thread struct"""
+    if 'Thread' not in _UNPACKERS_CACHE:
+        names = ['p_state', 'p_flags', 'p_prio', 'p_refs']
+        # p_time is optional
+        if 'p_time' in _thread_fields():
+            names.append('p_time')
+        _UNPACKERS_CACHE['Thread'] = _struct_unpackers(_thread_type(), names)
+    return _UNPACKERS_CACHE['Thread']
+
+
+class _StructArray(object):
+    """Elements of a struct array read from the target in a single memory
+    access. Each element is unpacked only when it is indexed, into a dict
+    mapping each of the requested field names to its integer value.
+    """
+    def __init__(self, array, count, names):
+        element_type = array.type.strip_typedefs().target()
+        self._element_size = element_type.sizeof
+        self._unpackers = _struct_unpackers(element_type, names)
+        self._count = count
+
+        inf = gdb.selected_inferior()
+        self._raw = bytes(inf.read_memory(array[0].address,
+                                          self._element_size * count))
+
+    def __len__(self):
+        return self._count
+
+    def __getitem__(self, index):
+        if not 0 <= index < self._count:
+            raise IndexError("struct array index out of range")
+        return _unpack_fields(self._raw, index * self._element_size,
+                              self._unpackers)
+
+
 class ChibiosPrefixCommand(gdb.Command):
     """Prefix for ChibiOS related helper commands"""
     def __init__(self):
@@ -11,22 +177,35 @@ class ChibiosPrefixCommand(gdb.Command):
                                                    gdb.COMPLETE_NONE,
                                                    True)
 
+# Byte used by CH_DBG_FILL_THREADS to fill unused thread stacks ('U')
+_STACK_FILL = b'\x55'
+
+# Number of stack bytes read from the target at a time when looking for fill
+_STACK_SCAN_CHUNK = 4096
+
+# Optional fields present in the Thread struct of the debuggee
+ThreadLayout = namedtuple('ThreadLayout', 'has_stklimit has_time')
+
 # List of all information to print for threads
-# Format is: <header_formatter> <header_title> <value_formatter>
-THREAD_INFO = [("{:10}", "Address", "{thread.address:#10x}"),
-               ("{:10}", "StkLimit", "{thread.stack_limit:#10x}"),
-               ("{:10}", "Stack", "{thread.stack_start:#10x}"),
-               ("{:>6}", "Free", "{thread.stack_unused:6}"),
-               ("{:>6}", "Total", "{thread.stack_size:6}"),
-               ("{:16}", "Name", "{thread.name:16}"),
-               ("{:10}", "State", "{thread.state_str}")]
+# Format is: <header_formatter> <header_title> <value_formatter> <attribute>
+THREAD_INFO = [("{:10}", "Address", "%#10x", "address"),
+               ("{:10}", "StkLimit", "%#10x", "stack_limit"),
+               ("{:10}", "Stack", "%#10x", "stack_start"),
+               ("{:>6}", "Free", "%6d", "stack_unused"),
+               ("{:>6}", "Total", "%6d", "stack_size"),
+               ("{:16}", "Name", "%-16s", "name"),
+               ("{:10}", "State", "%s", "state_str")]
 
 # Build the string for thread info header
 THREAD_INFO_HEADER_STRING = " ".join(each[0] for each in THREAD_INFO)
 THREAD_INFO_HEADER_DATA = [each[1] for each in THREAD_INFO]
 THREAD_INFO_HEADER = THREAD_INFO_HEADER_STRING.format(*THREAD_INFO_HEADER_DATA)
 
-# Build format string for thread info rows.
+# Build getter for the tuple of values in a thread info row.
+THREAD_INFO_VALUES = attrgetter(*(each[3] for each in THREAD_INFO))
+
+# Build format string for thread info rows, used as
+# THREAD_INFO % THREAD_INFO_VALUES(thread).
 THREAD_INFO = " ".join(each[2] for each in THREAD_INFO)
 
 
@@ -37,140 +216,135 @@ class ChibiosThread(object):
                     "WTANDEVT", "SNDMSGQ", "SNDMSG", "WTMSG",
                     "WTQUEUE", "FINAL"]
 
+    # ThreadLayout of the Thread struct, set by sanity_check() and reset when
+    # new symbols are loaded
+    _layout = None
+
+    __slots__ = ('address', 'stack_limit', 'stack_start', 'stack_size',
+                 '_stack_unused', 'name', 'state', 'flags', 'prio', 'refs',
+                 'time')
+
     def __init__(self, thread):
         """ Initialize a Thread object. Will throw exceptions if fields do not
         exist
 
         """
-        self._stklimit = 0
-        self._r13 = 0
-        self._address = 0
-        self._stack_size = 0
-        self._stack_unused = 0
-        self._name = "<no name>"
-        self._state = 0
-        self._flags = 0
-        self._prio = 0
-        self._refs = 0
-        self._time = 0
+        self.stack_limit = 0
+        self.name = "<no name>"
+        self.time = 0
+        # Computed on first use, see stack_unused
+        self._stack_unused = None
 
         # Extract all thread information
-        # Get a gdb.Type which is a void pointer.
-        void_p = gdb.lookup_type('void').pointer()
+        void_p = _void_ptr_type()
+        layout = ChibiosThread._layout
 
         # stklimit and r13 are different pointer types, so cast to get the
         # arithmetic correct
-        self._r13 = thread['p_ctx']['r13'].cast(void_p)
+        self.stack_start = long(thread['p_ctx']['r13'].cast(void_p))
 
         # p_stklimit is optional.
-        if 'p_stklimit' in thread.type.keys():
-            self._stklimit = thread['p_stklimit'].cast(void_p)
+        if layout.has_stklimit:
+            self.stack_limit = long(thread['p_stklimit'].cast(void_p))
 
-        # only try to dump the stack if we have reasonable confidence that it
-        # exists
-        if self._stklimit > 0:
-            self._stack_size = self._r13 - self._stklimit
-            # Try to dump the entire stack of the thread
-            inf = gdb.selected_inferior()
+        if self.stack_limit > 0:
+            self.stack_size = self.stack_start - self.stack_limit
+        else:
+            self.stack_size = 0
 
-            try:
-                stack = inf.read_memory(self._stklimit, self._stack_size)
+        self.address = long(thread.address)
 
-                # Find the first non-'U' (0x55) element in the stack space.
-                for i, each in enumerate(stack):
-                    if (each != 'U'):
-                        self._stack_unused = i
-                        break
-                else:
-                    # Everything is 'U', apparently.
-                    self._stack_unused = self._stack_size
+        name = thread['p_name'].string()
+        if name:
+            self.name = name
 
-            except gdb.MemoryError:
-                self._stack_unused = 0
+        # Read the scalar fields from a single copy of the whole struct
+        inf = gdb.selected_inferior()
+        raw = bytes(inf.read_memory(self.address, _thread_type().sizeof))
+        fields = _unpack_fields(raw, 0, _thread_unpackers())
 
-        else:
-            self._stack_size = 0
-            self._stack_unused = 0
+        self.state = fields['p_state']
+        self.flags = fields['p_flags']
+        self.prio = fields['p_prio']
+        self.refs = fields['p_refs']
 
-        self._address = thread.address
+        # p_time is optional
+        if layout.has_time:
+            self.time = fields['p_time']
 
-        if len(thread['p_name'].string()) > 0:
-            self._name = thread['p_name'].string()
+    def _compute_stack_unused(self):
+        """Return the number of bytes of the stack which have never been
+        used, according to the CH_DBG_FILL_THREADS fill pattern.
+        """
+        # only try to dump the stack if we have reasonable confidence that it
+        # exists, and don't bother the target with empty reads
+        if self.stack_limit <= 0 or self.stack_size <= 0:
+            return 0
 
-        self._state = int(thread['p_state'])
-        self._flags = thread['p_flags']
-        self._prio = thread['p_prio']
-        self._refs = thread['p_refs']
+        # Read the stack a chunk at a time, from the limit upwards, and stop
+        # at the first chunk which is not entirely fill.
+        inf = gdb.selected_inferior()
+        unused = 0
 
-        # p_time is optional
-        if 'p_time' in thread.type.keys():
-            self._time = thread['p_time']
+        for offset in xrange(0, self.stack_size, _STACK_SCAN_CHUNK):
+            length = min(_STACK_SCAN_CHUNK, self.stack_size - offset)
+
+            try:
+                chunk = bytes(inf.read_memory(self.stack_limit + offset,
+                                              length))
+            except gdb.MemoryError:
+                return 0
+
+            # Count the leading fill bytes in the chunk.
+            residue = chunk.lstrip(_STACK_FILL)
+            unused += length - len(residue)
+            if residue:
+                break
+
+        return unused
 
     @staticmethod
     def sanity_check():
         """Check to see if ChibiOS/RT has been built with enough debug
-        information to read thread information.
+        information to read thread information. Must be called before
+        constructing any ChibiosThread.
+
+        The result is kept until new symbols are loaded, so later calls
+        return immediately.
         """
-        thread_type = gdb.lookup_type('Thread')
+        if ChibiosThread._layout is not None:
+            return
+
+        thread_fields = _thread_fields()
 
         # Sanity checks on Thread
-        # From http://stackoverflow.com/questions/1285911/python-how-do-i-check-that-multiple-keys-are-in-a-dict-in-one-go
-        if not all(k in thread_type.keys() for k in ("p_newer", "p_older")):
+        if not thread_fields.issuperset(("p_newer", "p_older")):
             raise gdb.GdbError("ChibiOS/RT thread registry not enabled, cannot"
                                " access thread information!")
 
-        if 'p_stklimit' not in thread_type.keys():
+        layout = ThreadLayout(has_stklimit='p_stklimit' in thread_fields,
+                              has_time='p_time' in thread_fields)
+
+        if not layout.has_stklimit:
             print("No p_stklimit in Thread struct; enable"
                   " CH_DBG_ENABLE_STACK_CHECK")
 
-        if 'p_time' not in thread_type.keys():
+        if not layout.has_time:
             print("No p_time in Thread struct; enable"
                   " CH_DBG_THREADS_PROFILING")
 
-    @property
-    def name(self):
-        return self._name
-
-    @property
-    def stack_size(self):
-        return long(self._stack_size)
-
-    @property
-    def stack_limit(self):
-        return long(self._stklimit)
-
-    @property
-    def stack_start(self):
-        return long(self._r13)
+        ChibiosThread._layout = layout
 
     @property
     def stack_unused(self):
-        return long(self._stack_unused)
-
-    @property
-    def address(self):
-        return long(self._address)
-
-    @property
-    def state(self):
-        return self._state
+        if self._stack_unused is None:
+            self._stack_unused = self._compute_stack_unused()
+        return self._stack_unused
 
     @property
     def state_str(self):
         return ChibiosThread.THREAD_STATE[self.state]
 
-    @property
-    def flags(self):
-        return self._flags
-
-    @property
-    def prio(self):
-        return self._prio
-
-    @property
-    def time(self):
-        return self._time
-
 
 def chibios_get_threads():
     """ Create a list of ChibiosThreads for all threads currently in
@@ -183,22 +357,23 @@ def chibios_get_threads():
     threads = []
 
     # Walk the thread registry
-    rlist_p = gdb.parse_and_eval('&rlist')
-    rlist_as_thread = rlist_p.cast(gdb.lookup_type('Thread').pointer())
+    rlist_p = _symbol_address('rlist')
+    rlist_as_thread = rlist_p.cast(_thread_type().pointer())
     newer = rlist_as_thread.dereference()['p_newer']
-    older = rlist_as_thread.dereference()['p_older']
 
     while (newer != rlist_as_thread):
-        ch_thread = ChibiosThread(newer.dereference())
-        threads.append(ch_thread)
+        # Dereference each node once and reuse it
+        current = newer.dereference()
+        threads.append(ChibiosThread(current))
 
-        current = newer
-        newer = newer.dereference()['p_newer']
-        older = newer.dereference()['p_older']
+        following = current['p_newer']
+        older = following.dereference()['p_older']
 
-        if (older != current):
+        if (older != newer):
             raise gdb.GdbError('Rlist pointer invalid--corrupt list?')
 
+        newer = following
+
     return threads
 
 
@@ -219,9 +394,10 @@ class ChibiosThreadsCommand(gdb.Command):
         threads = chibios_get_threads()
 
         if threads is not None:
-            print(THREAD_INFO_HEADER)
-            for thread in threads:
-                print(THREAD_INFO.format(thread=thread))
+            lines = [THREAD_INFO_HEADER]
+            lines.extend(THREAD_INFO % THREAD_INFO_VALUES(thread)
+                         for thread in threads)
+            _write_lines(lines)
 
 
 class ChibiosThreadCommand(gdb.Command):
@@ -234,16 +410,24 @@ class ChibiosThreadCommand(gdb.Command):
     def invoke(self, args, from_tty):
         thread = gdb.selected_thread()
         if thread is not None:
-            threads = chibios_get_threads()
+            # Make sure Thread has enough info to work with
+            ChibiosThread.sanity_check()
 
             # inf.ptid is PID, LWID, TID; TID corresponds to the address in
             # memory of the Thread*.
-            newer = thread.ptid[2]
+            address = thread.ptid[2]
+
+            ch_thread = None
+            if address != 0:
+                thread_p = gdb.Value(address).cast(_thread_type().pointer())
+                try:
+                    ch_thread = ChibiosThread(thread_p.dereference())
+                except gdb.MemoryError:
+                    pass
 
-            ch_thread = next((i for i in threads if i.address == newer), None)
             if ch_thread is not None:
                 print(THREAD_INFO_HEADER)
-                print(THREAD_INFO.format(thread=ch_thread))
+                print(THREAD_INFO % THREAD_INFO_VALUES(ch_thread))
             else:
                 print("Invalid thread")
 
@@ -289,11 +473,13 @@ class ChibiosTraceCommand(gdb.Command):
         threads = chibios_get_threads()
 
         try:
-            dbg_trace_buffer = gdb.parse_and_eval("dbg_trace_buffer")
+            dbg_trace_buffer_p = _symbol_address('dbg_trace_buffer')
         except gdb.error:
             raise gdb.GdbError("Debug Trace Buffer not found. Compile with"
                                " CH_DBG_ENABLE_TRACE")
 
+        dbg_trace_buffer = dbg_trace_buffer_p.dereference()
+
         trace_buffer_size = int(dbg_trace_buffer['tb_size'])
 
         if (count > trace_buffer_size):
@@ -306,47 +492,41 @@ class ChibiosTraceCommand(gdb.Command):
         trace_start = int(current_trace.dereference().address -
                           trace_buffer.dereference().address)
 
-        traces = []
-
-        for i in xrange(trace_start, trace_buffer_size):
-            traces.append(trace_buffer[i])
-
-        for i in xrange(0, trace_start):
-            traces.append(trace_buffer[i])
-
-        print("{:>6} {:>8} {:10} {:16} {:10} {:10} {:16}".format("Event",
-                                                                 "Time",
-                                                                 "Previous",
-                                                                 "Name",
-                                                                 "State",
-                                                                 "Current",
-                                                                 "Name"))
-
-        trace_lines = []
-
-        # Print oldest trace separately since we don't have previous
-        # information
-        thread = next((i for i in threads if
-                       i.address == long(traces[0]['se_tp'])), None)
-        trace_lines.append(self.trace_line(-63,
-                                           int(traces[0]['se_time']),
-                                           int(traces[0]['se_state']),
-                                           None,
-                                           thread))
-
-        for j, event in enumerate(traces[1:], 1):
-            curr_thread = next((i for i in threads if
-                                i.address == long(event['se_tp'])), None)
-            prev_thread = next((i for i in threads if
-                                i.address == long(traces[j - 1]['se_tp'])), None)
-            trace_lines.append(self.trace_line(-63 + j,
-                                               int(event['se_time']),
-                                               int(event['se_state']),
-                                               prev_thread,
-                                               curr_thread))
-
-        for trace in trace_lines[-count:]:
-            print(trace)
+        # Read the whole buffer at once rather than one field at a time
+        try:
+            events = _StructArray(trace_buffer, trace_buffer_size,
+                                  ('se_time', 'se_state', 'se_tp'))
+        except gdb.MemoryError:
+            raise gdb.GdbError("Could not read the Debug Trace Buffer")
+
+        lines = ["{:>6} {:>8} {:10} {:16} {:10} {:10} {:16}".format(
+            "Event", "Time", "Previous", "Name", "State", "Current", "Name")]
+
+        # Index threads by the address of their Thread struct
+        threads_by_address = dict((i.address, i) for i in threads)
+
+        # Only the last count events are printed
+        first = max(0, trace_buffer_size - count)
+
+        # The previous thread comes from the event before the first one
+        # printed; the oldest event in the buffer has no previous information
+        prev_thread = None
+        if first > 0:
+            event = events[(trace_start + first - 1) % trace_buffer_size]
+            prev_thread = threads_by_address.get(event['se_tp'])
+
+        # The oldest event is the one tb_ptr will overwrite next
+        for j in xrange(first, trace_buffer_size):
+            event = events[(trace_start + j) % trace_buffer_size]
+            curr_thread = threads_by_address.get(event['se_tp'])
+            lines.append(self.trace_line(-63 + j,
+                                         event['se_time'],
+                                         event['se_state'],
+                                         prev_thread,
+                                         curr_thread))
+            prev_thread = curr_thread
+
+        _write_lines(lines)
 
 
 class ChibiosInfoCommand(gdb.Command):
@@ -358,7 +538,7 @@ class ChibiosInfoCommand(gdb.Command):
 
     def invoke(self, args, from_tty):
         try:
-            ch_debug = gdb.parse_and_eval('ch_debug')
+            ch_debug = _symbol_address('ch_debug').dereference()
         except gdb.error:
             raise gdb.GdbError("Could not find ch_debug")
 
@@ -372,6 +552,27 @@ class ChibiosInfoCommand(gdb.Command):
                                                    ch_patch))
 
 
+def _walk_vtlist(head):
+    """Yield (time, callback, param) for each timer in the virtual timer list
+    starting at head, dereferencing each node once.
+    """
+    vt_next = head.dereference()['vt_next']
+
+    while (vt_next != head):
+        node = vt_next.dereference()
+        yield (int(node['vt_time']),
+               long(node['vt_func']),
+               long(node['vt_par']))
+
+        following = node['vt_next']
+        vt_prev = following.dereference()['vt_prev']
+
+        if (vt_prev != vt_next):
+            raise gdb.GdbError('Vtlist pointer invalid--corrupt list?')
+
+        vt_next = following
+
+
 class ChibiosTimersCommand(gdb.Command):
     """Print current timers. Partially unimplemented"""
     def __init__(self):
@@ -380,31 +581,24 @@ class ChibiosTimersCommand(gdb.Command):
                                                    gdb.COMPLETE_NONE)
 
     def invoke(self, args, from_tty):
-        vtlist_p = gdb.parse_and_eval('&vtlist')
-
-        vtlist_as_timer = vtlist_p.cast(gdb.lookup_type("VirtualTimer").pointer())
+        vtlist_p = _symbol_address('vtlist')
 
-        vt_next = vtlist_as_timer.dereference()['vt_next']
-        vt_prev = vtlist_as_timer.dereference()['vt_prev']
+        timer_p = _lookup_type("VirtualTimer").pointer()
+        vtlist_as_timer = vtlist_p.cast(timer_p)
 
-        print("{:6} {:10} {:10}".format("Time",
-                                        "Callback",
-                                        "Param"))
+        lines = ["{:6} {:10} {:10}".format("Time",
+                                          "Callback",
+                                          "Param")]
 
-        while (vt_next != vtlist_as_timer):
-            vt_time = int(vt_next.dereference()['vt_time'])
-            vt_func = long(vt_next.dereference()['vt_func'])
-            vt_par = long(vt_next.dereference()['vt_par'])
-            print("{:6} {:#10x} {:#10x}".format(vt_time,
-                                                vt_func,
-                                                vt_par))
-
-            current = vt_next
-            vt_next = vt_next.dereference()['vt_next']
-            vt_prev = vt_next.dereference()['vt_prev']
-
-            if (vt_prev != current):
-                raise gdb.GdbError('Rlist pointer invalid--corrupt list?')
+        # Write out the timers read so far even if the list turns out to be
+        # corrupt, as they are what is needed to debug it
+        try:
+            for vt_time, vt_func, vt_par in _walk_vtlist(vtlist_as_timer):
+                lines.append("{:6} {:#10x} {:#10x}".format(vt_time,
+                                                           vt_func,
+                                                           vt_par))
+        finally:
+            _write_lines(lines)
 
 
 ChibiosPrefixCommand()